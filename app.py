@@ -1,13 +1,22 @@
-import traceback
+import os
+import logging
+import threading
 import pandas as pd
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, send_from_directory
 from flask_cors import CORS
 from sqlalchemy import create_engine, text, inspect
 from psycopg2.errors import UndefinedColumn
+from correlation_engine import CorrelationEngine
+from olap_cube import OlapCube
+from structured_logging import setup_logging, log_event
 
 app = Flask(__name__)
 CORS(app)
 
+# Non-blocking key/value logging; per-request success/miss lines are sampled
+setup_logging(app.logger, level=os.environ.get('LOG_LEVEL', 'INFO'))
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))
+
 # Database configuration
 DB_CONFIG = {
     'host': 'dpg-d095boadbo4c73964li0-a.oregon-postgres.render.com',
@@ -21,6 +30,12 @@ DB_CONFIG = {
 DATABASE_URI = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
 engine = create_engine(DATABASE_URI)
 
+# Pre-rendered API snapshot written by export_static.py
+SNAPSHOT_DIR = os.path.abspath(os.environ.get('SNAPSHOT_DIR', 'static_api'))
+
+# Partial-aggregate cube written by ingest_data.py
+CUBE_FILE = os.environ.get('CUBE_FILE', 'processed_data/olap_cube.npz')
+
 
 @app.route('/', methods=['GET'])
 def serve_index():
@@ -28,6 +43,25 @@ def serve_index():
     return render_template('index.html')
 
 
+@app.route('/snapshot/<path:filename>', methods=['GET'])
+def serve_snapshot(filename):
+    """Serve snapshot files; a CDN can serve the same directory without the app."""
+    response = None
+    if filename.endswith('.json') and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        if os.path.isfile(os.path.join(SNAPSHOT_DIR, filename + '.gz')):
+            response = send_from_directory(SNAPSHOT_DIR, filename + '.gz', mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers['Vary'] = 'Accept-Encoding'
+    if response is None:
+        response = send_from_directory(SNAPSHOT_DIR, filename)
+    # Objects are content-addressed and never change; only latest.json moves
+    if filename == 'latest.json':
+        response.headers['Cache-Control'] = 'public, max-age=60'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 def safe_query(query, params=None):
     """Execute a safe database query with error handling."""
     try:
@@ -35,7 +69,7 @@ def safe_query(query, params=None):
             result = pd.read_sql(text(query), conn, params=params)
         return result
     except Exception as e:
-        app.logger.error(f"Database error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "database_error", error=str(e))
         return pd.DataFrame()
 
 
@@ -49,10 +83,10 @@ def get_all_data():
     try:
         query = text("SELECT * FROM \"processed_data\"")
         df = pd.read_sql(query, engine)
-        app.logger.info("Successfully fetched all data")
+        log_event(app.logger, logging.INFO, "all_data_fetched", sample_rate=LOG_SAMPLE_RATE, rows=len(df))
         return jsonify(df.to_dict(orient='records')), 200
     except Exception as e:
-        app.logger.error(f"Error fetching all data: {str(e)}")
+        log_event(app.logger, logging.ERROR, "all_data_error", error=str(e))
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -72,13 +106,15 @@ def get_country_year_data(country, year):
                 k: float(v) if isinstance(v, (int, float)) else v
                 for k, v in data.items() if k not in ['Entity', 'Year']
             }
-            app.logger.info(f"Data found for {country} ({year})")
+            log_event(app.logger, logging.INFO, "country_year_found", sample_rate=LOG_SAMPLE_RATE,
+                      country=country, year=year)
             return jsonify(clean_data), 200
         else:
-            app.logger.warning(f"No data found for {country} ({year})")
+            log_event(app.logger, logging.WARNING, "country_year_missing", sample_rate=LOG_SAMPLE_RATE,
+                      country=country, year=year)
             return jsonify({"message": "No data found"}), 404
     except Exception as e:
-        app.logger.error(f"Error fetching country-year data: {str(e)}")
+        log_event(app.logger, logging.ERROR, "country_year_error", error=str(e))
         return jsonify({"error": "Internal server error"}), 500
 
 
@@ -101,8 +137,7 @@ def get_yearly_data():
         df = pd.read_sql(query, engine)
         return jsonify(df.to_dict(orient='records'))
     except Exception as e:
-        app.logger.error(f"Yearly data error: {str(e)}")
-        traceback.print_exc()
+        log_event(app.logger, logging.ERROR, "yearly_data_error", exc_info=True, error=str(e))
         return jsonify({"error": "Failed to fetch yearly data"}), 500
 
 
@@ -117,25 +152,138 @@ def get_valid_product_columns():
 VALID_PRODUCTS = get_valid_product_columns()
 
 
+def _int_arg(name):
+    """Read an optional integer query parameter, raising ValueError if it is malformed."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} parameter: must be an integer")
+
+
+_correlation_engine = None
+_correlation_lock = threading.Lock()
+
+
+def get_correlation_engine():
+    """Build the in-memory correlation engine on first use and reuse it afterwards."""
+    global _correlation_engine
+    if _correlation_engine is None:
+        with _correlation_lock:
+            if _correlation_engine is None:
+                df = pd.read_sql(text("SELECT * FROM \"processed_data\""), engine)
+                _correlation_engine = CorrelationEngine(df)
+                log_event(app.logger, logging.INFO, "correlation_engine_built", years=len(_correlation_engine.years))
+    return _correlation_engine
+
+
 @app.route('/api/scatter/<product1>/<product2>', methods=['GET'])
 def get_scatter_data(product1, product2):
-    """Get data for scatter plot"""
+    """Get data for scatter plot for any year (latest by default)"""
     try:
         if product1 not in VALID_PRODUCTS or product2 not in VALID_PRODUCTS:
             return jsonify({"error": "Invalid product name(s)"}), 400
-
-        query = text(f"""
-            SELECT entity, "{product1}", "{product2}"
-            FROM "processed_data"
-            WHERE "Year" = (SELECT MAX("Year") FROM "processed_data")
-        """)
-        df = pd.read_sql(query, engine)
-        return jsonify(df.to_dict(orient='records')), 200
+        try:
+            year = _int_arg('year')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        correlations = get_correlation_engine()
+        year = correlations.resolve_year(year)
+        if year is None:
+            return jsonify({"error": "No data found for the specified year"}), 404
+        return jsonify(correlations.scatter(product1, product2, year)), 200
     except Exception as e:
-        app.logger.error(f"Scatter plot error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "scatter_error", error=str(e))
         return jsonify({"error": "Internal server error"}), 500
 
 
+@app.route('/api/correlation', methods=['GET'])
+def get_correlation_matrix():
+    """Get product x product Pearson and Spearman matrices for a year (latest by default)"""
+    try:
+        try:
+            year = _int_arg('year')
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        correlations = get_correlation_engine()
+        year = correlations.resolve_year(year)
+        if year is None:
+            return jsonify({"error": "No data found for the specified year"}), 404
+        return jsonify(correlations.correlation(year)), 200
+    except Exception as e:
+        log_event(app.logger, logging.ERROR, "correlation_error", error=str(e))
+        return jsonify({"error": "Failed to fetch correlation data"}), 500
+
+
+_olap_cube = None
+_olap_cube_lock = threading.Lock()
+
+
+def get_olap_cube():
+    """Load the precomputed cube once, building it from processed_data if the file is missing."""
+    global _olap_cube
+    if _olap_cube is None:
+        with _olap_cube_lock:
+            if _olap_cube is None:
+                if os.path.exists(CUBE_FILE):
+                    _olap_cube = OlapCube.load(CUBE_FILE)
+                else:
+                    df = pd.read_sql(text("SELECT * FROM \"processed_data\""), engine)
+                    _olap_cube = OlapCube.from_frame(df)
+                log_event(app.logger, logging.INFO, "olap_cube_loaded", measures=len(_olap_cube.measures))
+    return _olap_cube
+
+
+def _list_arg(name):
+    """Read a repeatable query parameter, also splitting comma-separated values."""
+    return [item for value in request.args.getlist(name) for item in value.split(',') if item]
+
+
+def _int_list_arg(name):
+    """Read a repeatable integer query parameter, raising ValueError if any value is malformed."""
+    try:
+        return [int(value) for value in _list_arg(name)]
+    except ValueError:
+        raise ValueError(f"Invalid {name} parameter: must be an integer")
+
+
+@app.route('/api/aggregate', methods=['GET'])
+def get_aggregate():
+    """Aggregate any measures by entity/year/decade from the precomputed cube.
+
+    Query parameters: group_by (entity, year, decade), measure (repeat per
+    product; defaults to all), agg (sum, count, min, max, avg, var, std),
+    and filters entity / year / decade (repeatable) and year_min / year_max.
+    """
+    try:
+        filters = {}
+        if request.args.getlist('entity'):
+            filters['entity'] = request.args.getlist('entity')
+        for dim in ('year', 'decade'):
+            if request.args.getlist(dim):
+                filters[dim] = _int_list_arg(dim)
+        for bound in ('year_min', 'year_max'):
+            if request.args.get(bound) is not None:
+                filters[bound] = _int_arg(bound)
+
+        records = get_olap_cube().query(
+            group_by=_list_arg('group_by'),
+            measures=request.args.getlist('measure'),
+            aggs=_list_arg('agg') or ['sum'],
+            filters=filters
+        )
+        return jsonify(records), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        log_event(app.logger, logging.ERROR, "aggregate_error", error=str(e))
+        return jsonify({"error": "Failed to fetch aggregate data"}), 500
+
+
 @app.route('/api/stats', methods=['GET'])
 def get_production_stats():
     """Get statistical summary data"""
@@ -152,7 +300,7 @@ def get_production_stats():
             }
         return jsonify(stats_data)
     except Exception as e:
-        app.logger.error(f"Stats data error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "stats_data_error", error=str(e))
         return jsonify({"error": "Failed to fetch statistics"}), 500
 
 
@@ -175,7 +323,7 @@ def get_decade_data_for_product():
             return jsonify({"message": "No data found for the specified product."}), 404
         return jsonify(df.to_dict(orient='records')), 200
     except Exception as e:
-        app.logger.error(f"Decade data error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "decade_data_error", error=str(e))
         return jsonify({"error": "Failed to fetch decade data"}), 500
 
 
@@ -214,7 +362,7 @@ def get_stats_for_product():
             "upper_bound": result['upper_bound']
         }), 200
     except Exception as e:
-        app.logger.error(f"Stats error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "product_stats_error", error=str(e))
         return jsonify({"error": "Failed to fetch stats"}), 500
 
 
@@ -226,7 +374,7 @@ def get_countries():
         df = pd.read_sql(query, engine)
         return jsonify(df['Entity'].tolist())
     except Exception as e:
-        app.logger.error(f"Countries error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "countries_error", error=str(e))
         return jsonify({"error": "Failed to fetch countries"}), 500
 
 
@@ -238,7 +386,7 @@ def get_years():
         df = pd.read_sql(query, engine)
         return jsonify(df['Year'].astype(int).tolist())
     except Exception as e:
-        app.logger.error(f"Years error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "years_error", error=str(e))
         return jsonify({"error": "Failed to fetch years"}), 500
 
 
@@ -251,7 +399,7 @@ def get_products():
         products = [col['name'] for col in columns if '_Production' in col['name']]
         return jsonify(products)
     except Exception as e:
-        app.logger.error(f"Products error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "products_error", error=str(e))
         return jsonify({"error": "Failed to fetch products"}), 500
 
 
@@ -269,7 +417,7 @@ def get_production_trend(country, product):
         df = pd.read_sql(query, engine, params={'country': country})
         return jsonify(df.to_dict(orient='records'))
     except Exception as e:
-        app.logger.error(f"Trend data error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "trend_data_error", error=str(e))
         return jsonify({"error": "Failed to fetch trend data"}), 500
 
 
@@ -286,7 +434,7 @@ def get_global_distribution(year, product):
         df = pd.read_sql(query, engine, params={'year': year})
         return jsonify(df.to_dict(orient='records'))
     except Exception as e:
-        app.logger.error(f"Map data error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "map_data_error", error=str(e))
         return jsonify({"error": "Failed to fetch map data"}), 500
 
 
@@ -305,7 +453,7 @@ def get_stacked_data(year):
         df = pd.read_sql(query, engine, params={'year': year})
         return jsonify(df.to_dict(orient='records'))
     except Exception as e:
-        app.logger.error(f"Stacked data error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "stacked_data_error", error=str(e))
         return jsonify({"error": "Failed to fetch stacked data"}), 500
 
 
@@ -338,8 +486,7 @@ def get_bubble_data():
             })
         return jsonify(records)
     except Exception as e:
-        app.logger.error(f"Bubble chart error: {str(e)}")
-        traceback.print_exc()
+        log_event(app.logger, logging.ERROR, "bubble_data_error", exc_info=True, error=str(e))
         return jsonify({"error": "Failed to fetch bubble data"}), 500
 
 
@@ -360,7 +507,7 @@ def get_top_producers():
             return jsonify({"message": "No data found for the specified crop type"}), 404
         return jsonify(df.to_dict(orient='records')), 200
     except Exception as e:
-        app.logger.error(f"Top producers error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "top_producers_error", error=str(e))
         return jsonify({"error": "Failed to fetch top producers"}), 500
 
 
@@ -375,7 +522,7 @@ def get_product_list():
         df = pd.read_sql(query, engine)
         return jsonify(df['crop_type'].tolist()), 200
     except Exception as e:
-        app.logger.error(f"Product list API error: {str(e)}")
+        log_event(app.logger, logging.ERROR, "product_list_error", error=str(e))
         return jsonify({"error": f"Failed to fetch product list: {str(e)}"}), 500
 
 
@@ -405,7 +552,7 @@ def compare_with_top_producers(country, year, product):
     try:
         # Validate product parameter
         if product not in VALID_PRODUCTS:
-            app.logger.warning(f"Invalid product requested: {product}")
+            log_event(app.logger, logging.WARNING, "invalid_product", sample_rate=LOG_SAMPLE_RATE, product=product)
             return jsonify({"error": "Invalid product type"}), 400
 
         # 1. Get selected country/year production
@@ -417,7 +564,8 @@ def compare_with_top_producers(country, year, product):
         selected_df = pd.read_sql(query_selected, engine, params={'country': country, 'year': year})
 
         if selected_df.empty:
-            app.logger.warning(f"No data found for {country} ({year})")
+            log_event(app.logger, logging.WARNING, "country_year_missing", sample_rate=LOG_SAMPLE_RATE,
+                      country=country, year=year)
             return jsonify({"error": "No data found for selected country/year"}), 404
 
         # Convert numpy types to Python native types
@@ -436,7 +584,7 @@ def compare_with_top_producers(country, year, product):
         top_df = pd.read_sql(query_top, engine, params={'crop_type': product})
 
         if top_df.empty:
-            app.logger.warning(f"No top producers found for {product}")
+            log_event(app.logger, logging.WARNING, "top_producers_missing", sample_rate=LOG_SAMPLE_RATE, product=product)
             return jsonify({"error": "No top producers data available"}), 404
 
         # Calculate max production
@@ -482,7 +630,8 @@ def compare_with_top_producers(country, year, product):
         return jsonify(response), 200
 
     except Exception as e:
-        app.logger.error(f"Comparison error for {country}/{year}/{product}: {str(e)}", exc_info=True)
+        log_event(app.logger, logging.ERROR, "comparison_error", exc_info=True,
+                  country=country, year=year, product=product, error=str(e))
         return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,239 @@
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+import sanitise
+from db_loader import load_tables
+from ingest_data import read_csv_table, read_json_table
+
+# Synthetic inputs copy the header of the real extract; 1x is about its size
+SOURCE_CSV = "world food production.csv"
+BASE_ENTITIES = 200
+YEARS = range(1961, 2022)
+DEFAULT_SCALES = [1, 10, 100]
+RESULTS_DIR = "benchmark_results"
+
+# Share of generated cells/rows carrying each kind of dirt
+NAN_RATE = 0.02
+NEGATIVE_RATE = 0.005
+TIE_RATE = 0.2
+DUPLICATE_RATE = 0.01
+BAD_YEAR_RATE = 0.001
+
+STAGES = ['parse', 'clean', 'clip_aggregate', 'top_n', 'write', 'load_db']
+
+
+def generate_dataset(path, scale, seed=0):
+    """Write a synthetic CSV shaped like the source extract at ``scale`` times its size.
+
+    Values are log-normal per entity and product, with NaNs, negatives,
+    coarsely rounded values (ties, including at the top-10 cut-off),
+    exact duplicate rows and out-of-range years mixed in.
+    """
+    rng = np.random.default_rng(seed)
+    columns = pd.read_csv(SOURCE_CSV, nrows=0).columns.tolist()
+    products = columns[2:]
+
+    n_entities = BASE_ENTITIES * scale
+    entities = np.repeat([f"Entity {i:06d}" for i in range(n_entities)], len(YEARS))
+    years = np.tile(np.asarray(YEARS), n_entities)
+    n_rows = len(entities)
+
+    entity_scale = np.repeat(rng.lognormal(12, 2, (n_entities, len(products))), len(YEARS), axis=0)
+    values = np.round(entity_scale * rng.lognormal(0, 0.3, (n_rows, len(products))))
+    ties = rng.random(values.shape) < TIE_RATE
+    values[ties] = np.round(values[ties], -3)
+    values[rng.random(values.shape) < NEGATIVE_RATE] *= -1
+    values[rng.random(values.shape) < NAN_RATE] = np.nan
+
+    df = pd.DataFrame(values, columns=products)
+    df.insert(0, columns[1], years)
+    df.insert(0, columns[0], entities)
+    df.loc[rng.random(n_rows) < BAD_YEAR_RATE, columns[1]] = 1850
+    duplicates = df.sample(frac=DUPLICATE_RATE, random_state=seed)
+    df = pd.concat([df, duplicates], ignore_index=True)
+    df.to_csv(path, index=False)
+    return len(df)
+
+
+def _measure(func, trace_memory):
+    """Run ``func`` and return (result, seconds, peak traced bytes or None)."""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_pipeline(csv_path, work_dir, trace_memory=False, load_workers=1):
+    """Run each pipeline stage once; return {stage: (seconds, peak_bytes)}."""
+    out_dir = os.path.join(work_dir, "out")
+    shutil.rmtree(out_dir, ignore_errors=True)  # outputs are timestamped, so start each run empty
+    os.makedirs(out_dir)
+    db_path = os.path.join(work_dir, "bench.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    measurements = {}
+
+    def stage(name, func):
+        result, seconds, peak = _measure(func, trace_memory)
+        measurements[name] = (seconds, peak)
+        return result
+
+    raw = stage('parse', lambda: pd.read_csv(csv_path))
+    df, entity_col, year_col, numeric_cols, initial_count = stage('clean', lambda: sanitise.clean_frame(raw))
+
+    def clip_aggregate():
+        stats = sanitise.compute_product_statistics(df[numeric_cols].to_numpy(dtype=np.float64),
+                                                    df[year_col].to_numpy())
+        df[numeric_cols] = stats['matrix']
+        return stats
+    stats = stage('clip_aggregate', clip_aggregate)
+    top_producers = stage('top_n', lambda: sanitise.select_top_producers(df, entity_col, year_col, numeric_cols))
+    paths = stage('write', lambda: sanitise.save_outputs(df, entity_col, year_col, numeric_cols, stats,
+                                                          top_producers, initial_count, out_dir))
+
+    # Load the written files the way ingest_data.py does, parsing included
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        stage('load_db', lambda: load_tables(engine, {
+            "processed_data": lambda: read_csv_table(paths["processed"]),
+            "yearly_production": lambda: read_csv_table(paths["yearly"]),
+            "decade_production": lambda: read_csv_table(paths["decade"]),
+            "food_stats": lambda: read_csv_table(paths["stats"]),
+            "top_producers": lambda: read_json_table(paths["top_producers"]),
+        }, max_workers=load_workers))
+    finally:
+        engine.dispose()
+    return measurements
+
+
+def benchmark_scale(scale, work_dir, repeat=3, load_workers=1, seed=0):
+    """Benchmark one scale: best-of-``repeat`` timings plus one traced-memory run."""
+    csv_path = os.path.join(work_dir, f"synthetic_{scale}x_seed{seed}.csv")
+    if not os.path.exists(csv_path):
+        print(f"Generating {scale}x synthetic input...")
+        generate_dataset(csv_path, scale, seed)
+    rows = sum(1 for _ in open(csv_path)) - 1
+
+    timings = {name: [] for name in STAGES}
+    for run in range(repeat):
+        for name, (seconds, _) in run_pipeline(csv_path, work_dir, load_workers=load_workers).items():
+            timings[name].append(seconds)
+    memory = run_pipeline(csv_path, work_dir, trace_memory=True, load_workers=load_workers)
+
+    return {
+        "rows": rows,
+        "input_mb": round(os.path.getsize(csv_path) / 1e6, 2),
+        "stages": {
+            name: {
+                "seconds": min(timings[name]),
+                "seconds_all": timings[name],
+                "peak_mb": round(memory[name][1] / 1e6, 2),
+            }
+            for name in STAGES
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(current, baseline_path, threshold):
+    """Print per-stage time ratios against a previous results file; return regressed stages."""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {baseline.get('commit')} ({baseline_path}):")
+    regressions = []
+    for scale, result in current["scales"].items():
+        previous = baseline["scales"].get(scale)
+        if previous is None:
+            continue
+        for name in STAGES:
+            old = previous["stages"].get(name, {}).get("seconds")
+            new = result["stages"][name]["seconds"]
+            if not old:
+                continue
+            ratio = new / old
+            flag = "  REGRESSION" if ratio > 1 + threshold else ""
+            print(f"  {scale:>4}x {name:<15} {old:9.3f}s -> {new:9.3f}s  x{ratio:5.2f}{flag}")
+            if flag:
+                regressions.append(f"{scale}x/{name}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sanitise/ingest pipeline on synthetic inputs")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scale (best is kept)")
+    parser.add_argument("--load-workers", type=int, default=1, help="SQLite serialises writers, so 1 by default")
+    parser.add_argument("--work-dir", default=None, help="keep generated inputs here between runs")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio flagged as a regression")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Keep pipeline logging quiet so it does not skew timings
+    sanitise.logger.setLevel(logging.WARNING)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="pipeline_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    try:
+        for scale in args.scales:
+            result = benchmark_scale(scale, work_dir, args.repeat, args.load_workers, args.seed)
+            results["scales"][str(scale)] = result
+            print(f"{scale}x ({result['rows']} rows, {result['input_mb']} MB):")
+            for name, stage in result["stages"].items():
+                print(f"  {name:<15} {stage['seconds']:9.3f}s  peak {stage['peak_mb']:9.2f} MB")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir,
+                               f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['commit']}.json")
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Saved benchmark results to {output_path}")
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
 #!/bin/bash
-python ingest_data.py
\ No newline at end of file
+python ingest_data.py
+python export_static.py
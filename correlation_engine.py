@@ -0,0 +1,129 @@
+import numpy as np
+
+
+class CorrelationEngine:
+    """Per-year product x product Pearson and Spearman matrices held in memory.
+
+    The processed table is reshaped into a (years, rows, products) array
+    padded with NaN, and every year's matrices are computed together with
+    pairwise-complete observations. Scatter pairs are sliced from the same
+    array, so no request touches the database once the engine is built.
+    """
+
+    def __init__(self, df, entity_col='Entity', year_col='Year', products=None):
+        self.products = list(products or [col for col in df.columns if '_Production' in col])
+        self.product_index = {product: i for i, product in enumerate(self.products)}
+
+        df = df.sort_values([year_col, entity_col], kind='stable').reset_index(drop=True)
+        self.years = np.sort(df[year_col].unique()).astype(int)
+        self.year_index = {int(year): i for i, year in enumerate(self.years)}
+
+        year_codes = np.searchsorted(self.years, df[year_col].to_numpy())
+        row_codes = df.groupby(year_col).cumcount().to_numpy()
+        shape = (len(self.years), row_codes.max() + 1 if len(df) else 0)
+
+        self.entities = np.full(shape, None, dtype=object)
+        self.entities[year_codes, row_codes] = df[entity_col].to_numpy()
+        self.values = np.full(shape + (len(self.products),), np.nan)
+        self.values[year_codes, row_codes] = df[self.products].to_numpy(dtype=np.float64)
+
+        # Average ranks within each year give Spearman as Pearson over ranks
+        ranks = np.full_like(self.values, np.nan)
+        ranks[year_codes, row_codes] = df.groupby(year_col)[self.products].rank(method='average').to_numpy()
+
+        self.pearson = self._pearson(self.values)
+        self.spearman = self._pearson(ranks)
+        self._rerank_incomplete_pairs()
+
+    def _rerank_incomplete_pairs(self):
+        """Recompute Spearman on each pair's common rows where NaNs make them differ.
+
+        Per-product ranks are only valid for a pair when both products are
+        present on the same rows; otherwise the pair is re-ranked over its
+        joint mask, matching pandas' pairwise-complete Spearman.
+        """
+        mask = ~np.isnan(self.values)
+        present = mask.sum(axis=1)
+        joint = np.einsum('yei,yej->yij', mask.astype(np.float64), mask.astype(np.float64))
+        incomplete = (joint < present[:, :, None]) | (joint < present[:, None, :])
+        for y, i, j in zip(*np.nonzero(np.triu(incomplete, 1))):
+            both = mask[y, :, i] & mask[y, :, j]
+            corr = np.nan
+            if both.sum() >= 2:
+                rank_i = _average_ranks(self.values[y, both, i])
+                rank_j = _average_ranks(self.values[y, both, j])
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    corr = np.corrcoef(rank_i, rank_j)[0, 1]
+            self.spearman[y, i, j] = self.spearman[y, j, i] = corr
+
+    @staticmethod
+    def _pearson(values):
+        """Pairwise-complete Pearson matrices for a (years, rows, products) array."""
+        mask = (~np.isnan(values)).astype(np.float64)
+        # Centre per year and product first to keep the sums of squares well conditioned
+        with np.errstate(invalid='ignore', divide='ignore'):
+            centre = np.nansum(values, axis=1, keepdims=True) / mask.sum(axis=1, keepdims=True)
+        x = np.where(mask > 0, values - np.nan_to_num(centre), 0.0)
+
+        n = np.einsum('yei,yej->yij', mask, mask)
+        sx = np.einsum('yei,yej->yij', x, mask)  # sum of product i over rows where j is present
+        sxx = np.einsum('yei,yej->yij', x * x, mask)
+        sxy = np.einsum('yei,yej->yij', x, x)
+        sy = sx.transpose(0, 2, 1)
+        syy = sxx.transpose(0, 2, 1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[n < 2] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def resolve_year(self, year=None):
+        """Return the year to serve (latest when omitted), or None if unknown."""
+        if year is None:
+            return int(self.years[-1]) if len(self.years) else None
+        return int(year) if int(year) in self.year_index else None
+
+    def correlation(self, year):
+        """Return both matrices for a year as nested lists (NaN -> None)."""
+        y = self.year_index[year]
+        return {
+            "year": year,
+            "products": self.products,
+            "pearson": _to_json_matrix(self.pearson[y]),
+            "spearman": _to_json_matrix(self.spearman[y])
+        }
+
+    def scatter(self, product1, product2, year):
+        """Return the entity records for one product pair in a year."""
+        y = self.year_index[year]
+        i, j = self.product_index[product1], self.product_index[product2]
+        present = self.entities[y] != None  # noqa: E711 - elementwise on an object array
+        return [
+            {"Entity": entity, product1: _to_json_value(a), product2: _to_json_value(b)}
+            for entity, a, b in zip(self.entities[y][present],
+                                    self.values[y, present, i],
+                                    self.values[y, present, j])
+        ]
+
+
+def _average_ranks(values):
+    """1-based ranks of a 1-D array, ties sharing their average rank."""
+    order = np.argsort(values, kind='mergesort')
+    inverse = np.empty(len(values), dtype=np.int64)
+    inverse[order] = np.arange(len(values))
+    ordered = values[order]
+    starts = np.r_[True, ordered[1:] != ordered[:-1]]
+    dense = np.cumsum(starts)[inverse]
+    bounds = np.r_[np.flatnonzero(starts), len(values)]
+    return 0.5 * (bounds[dense] + bounds[dense - 1] + 1)
+
+
+def _to_json_value(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _to_json_matrix(matrix):
+    return [[_to_json_value(v) for v in row] for row in matrix]
@@ -2,6 +2,7 @@ import pandas as pd
 from sqlalchemy import create_engine, text
 from sqlalchemy.types import Integer, String, DECIMAL
 from sqlalchemy.exc import SQLAlchemyError
+from db_loader import load_tables, DEFAULT_CHUNKSIZE
 
 # Database configuration
 DB_USER = 'root'
@@ -9,8 +10,15 @@ DB_PASSWORD = ''
 DB_HOST = 'localhost'
 DB_NAME = 'food_production'
 
-# Create a database engine
+# Loader tuning: rows per INSERT batch. LOAD DATA LOCAL INFILE is faster but needs
+# local_infile=ON on the server (off by default in MySQL 8), so it is opt-in
+LOAD_CHUNKSIZE = DEFAULT_CHUNKSIZE
+USE_LOAD_DATA_INFILE = False
+
+# Create a server engine (for CREATE DATABASE) and one engine bound to the database
 engine = create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/')
+engine_with_db = create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}',
+                               connect_args={'local_infile': USE_LOAD_DATA_INFILE})
 
 # Define the data types for the SQL table
 dtype = {
@@ -46,13 +54,10 @@ def save_data_to_mysql(df):
         # Create the database if it does not exist
         with engine.connect() as connection:
             connection.execute(text(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}"))
-            connection.execute(text(f"USE {DB_NAME}"))  # Use the created database
-
-        # Create a new engine with the database included
-        engine_with_db = create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
 
         # Save the DataFrame to the MySQL database
-        df.to_sql('production_data', engine_with_db, if_exists='replace', index=False, dtype=dtype)
+        load_tables(engine_with_db, {'production_data': df}, dtypes={'production_data': dtype},
+                    chunksize=LOAD_CHUNKSIZE, use_load_data=USE_LOAD_DATA_INFILE)
         print("Data added to the database successfully!")
     except SQLAlchemyError as e:
         print(f"Error occurred: {e}")
@@ -0,0 +1,81 @@
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+# Rows per INSERT batch; raise it for high-latency links
+DEFAULT_CHUNKSIZE = 1000
+
+
+def load_table(engine, table_name, df, dtype=None, chunksize=DEFAULT_CHUNKSIZE,
+               use_load_data=False, if_exists="replace", method=None):
+    """Load one DataFrame into a table on its own connection and return (rows, seconds).
+
+    By default rows go through executemany, which SQLAlchemy 2.0 (psycopg2)
+    and PyMySQL already batch into multi-row INSERTs; ``method='multi'``
+    makes pandas build those statements itself, which is much slower to
+    compile. With ``use_load_data`` (MySQL
+    only) the table is created from the DataFrame schema and the rows are
+    streamed with LOAD DATA LOCAL INFILE, which needs an engine created with
+    ``connect_args={'local_infile': True}``; if the server refuses it (MySQL 8
+    ships with local_infile=OFF) the table falls back to batched INSERTs.
+    """
+    start = time.perf_counter()
+    if use_load_data:
+        try:
+            with engine.begin() as conn:
+                df.head(0).to_sql(table_name, con=conn, if_exists=if_exists, index=False, dtype=dtype)
+                _load_data_infile(conn, table_name, df)
+            return len(df), time.perf_counter() - start
+        except SQLAlchemyError as e:
+            print(f"LOAD DATA LOCAL INFILE failed for {table_name}, falling back to INSERTs: {e}")
+    with engine.begin() as conn:
+        df.to_sql(table_name, con=conn, if_exists=if_exists, index=False, dtype=dtype,
+                  method=method, chunksize=chunksize)
+    return len(df), time.perf_counter() - start
+
+
+def _load_data_infile(conn, table_name, df):
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        df.to_csv(path, index=False, header=False, na_rep='\\N', lineterminator='\n')
+        columns = ", ".join(f"`{col}`" for col in df.columns)
+        # Forward slashes keep Windows temp paths valid inside the SQL string literal
+        infile = path.replace('\\', '/')
+        conn.execute(text(
+            f"LOAD DATA LOCAL INFILE '{infile}' INTO TABLE `{table_name}` "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '\\n' ({columns})"
+        ))
+    finally:
+        os.remove(path)
+
+
+def load_tables(engine, tables, dtypes=None, chunksize=DEFAULT_CHUNKSIZE, max_workers=None,
+                use_load_data=False, if_exists="replace", method=None):
+    """Load independent tables concurrently, one connection per table.
+
+    ``tables`` maps table name to a DataFrame or to a zero-argument callable
+    returning one, so reading the source also happens in the worker thread.
+    Prints rows/s for each table and returns {table: (rows, seconds)}.
+    """
+    dtypes = dtypes or {}
+
+    def _load(table_name, source):
+        df = source() if callable(source) else source
+        return load_table(engine, table_name, df, dtype=dtypes.get(table_name), chunksize=chunksize,
+                          use_load_data=use_load_data, if_exists=if_exists, method=method)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(tables) or 1) as pool:
+        futures = {name: pool.submit(_load, name, source) for name, source in tables.items()}
+        for name, future in futures.items():
+            rows, seconds = future.result()
+            results[name] = (rows, seconds)
+            print(f"Loaded {rows} rows into table: {name} in {seconds:.2f}s "
+                  f"({rows / seconds if seconds else 0:,.0f} rows/s)")
+    return results
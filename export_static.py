@@ -0,0 +1,154 @@
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Render from exactly the files ingest_data.py loads into the database
+from ingest_data import CSV_FILES, JSON_FILE
+
+# Snapshot output: <OUTPUT_DIR>/<version>/manifest.json + content-addressed objects
+OUTPUT_DIR = "static_api"
+LATEST_FILE = "latest.json"
+TOP_PRODUCERS_LIMIT = 10
+STACKED_COLUMNS = {"Maize_Production": "maize", "Rice_Production": "rice", "Wheat_Production": "wheat"}
+
+
+def round_like_ingest(df):
+    """Apply the same float rounding ingest_data.py does before loading a table."""
+    for col in df.select_dtypes(include=['float64']).columns:
+        df[col] = df[col].round(0).astype(int)
+    return df
+
+
+def to_native(value):
+    """Convert numpy scalars / NaN into JSON-friendly Python values."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def records(df):
+    return [{k: to_native(v) for k, v in row.items()} for row in df.to_dict(orient='records')]
+
+
+def write_object(build_dir, payload):
+    """Write a response body as <sha256>.json plus a .json.gz sibling; return its relative path."""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()
+    rel_path = f"objects/{digest[:2]}/{digest}.json"
+    path = os.path.join(build_dir, rel_path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(body)
+        # mtime=0 keeps the gzip bytes reproducible between builds
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    return rel_path
+
+
+def render_year(build_dir, year, year_df, products):
+    """Render /api/map/<year>/<product> for every product and /api/stacked/<year>."""
+    routes = {}
+    for product in products:
+        payload = records(year_df[['Entity', product]].rename(columns={product: 'value'}))
+        routes[f"/api/map/{year}/{product}"] = write_object(build_dir, payload)
+
+    stacked = year_df[['Entity'] + list(STACKED_COLUMNS)].rename(columns=STACKED_COLUMNS)
+    routes[f"/api/stacked/{year}"] = write_object(build_dir, records(stacked))
+    return routes
+
+
+def render_products(build_dir, products, decade_df, stats_df, top_producers):
+    """Render the per-product /api/data/decade, /api/data/stats and /api/top_producers responses."""
+    routes = {}
+    for product in products:
+        if product in decade_df.columns:
+            decade = decade_df[['decade', product]].rename(columns={product: 'production'})
+            decade['production'] = decade['production'].astype(float)
+            routes[f"/api/data/decade?product={product}"] = write_object(build_dir, records(decade))
+
+        if product in stats_df.columns and stats_df[product].notna().any():
+            values = stats_df[product].dropna().astype(float)
+            mean, std = values.mean(), values.std()
+            routes[f"/api/data/stats?product={product}"] = write_object(build_dir, {
+                "mean": mean,
+                "std": std,
+                "min": values.min(),
+                "max": values.max(),
+                "lower_bound": mean - std,
+                "upper_bound": mean + std
+            })
+
+    for crop_type, regions in top_producers.items():
+        top = sorted(regions.items(), key=lambda item: item[1], reverse=True)[:TOP_PRODUCERS_LIMIT]
+        routes[f"/api/top_producers?crop_type={crop_type}"] = write_object(build_dir, [
+            {"region": region, "production_value": int(round(production))} for region, production in top
+        ])
+    return routes
+
+
+def export_snapshot(output_dir=OUTPUT_DIR, processed_csv=None, workers=None):
+    """Render every finite API response into <output_dir>/<version> and return the version."""
+    processed_csv = processed_csv or CSV_FILES["processed"]
+    print(f"Rendering snapshot from {processed_csv}")
+
+    processed = round_like_ingest(pd.read_csv(processed_csv))
+    decade_df = round_like_ingest(pd.read_csv(CSV_FILES["decade"]))
+    stats_df = round_like_ingest(pd.read_csv(CSV_FILES["stats"]))
+    with open(JSON_FILE, 'r') as f:
+        top_producers = json.load(f)
+    products = [col for col in processed.columns if '_Production' in col]
+
+    os.makedirs(output_dir, exist_ok=True)
+    build_dir = os.path.join(output_dir, f".build-{os.getpid()}")
+    os.makedirs(build_dir, exist_ok=True)
+
+    routes = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(render_year, build_dir, int(year), year_df, products)
+            for year, year_df in processed.groupby('Year', sort=True)
+        ]
+        futures.append(pool.submit(render_products, build_dir, products, decade_df, stats_df, top_producers))
+        for future in futures:
+            routes.update(future.result())
+
+    # The version is derived from the content, so identical data gives the same directory
+    manifest_body = json.dumps(dict(sorted(routes.items())), sort_keys=True).encode('utf-8')
+    version = hashlib.sha256(manifest_body).hexdigest()[:16]
+    with open(os.path.join(build_dir, 'manifest.json'), 'w') as f:
+        json.dump({"version": version, "routes": dict(sorted(routes.items()))}, f, indent=1)
+
+    version_dir = os.path.join(output_dir, version)
+    if os.path.exists(version_dir):
+        shutil.rmtree(build_dir)
+        print(f"Snapshot {version} already exists, reusing it")
+    else:
+        os.rename(build_dir, version_dir)
+
+    latest_tmp = os.path.join(output_dir, LATEST_FILE + '.tmp')
+    with open(latest_tmp, 'w') as f:
+        json.dump({"version": version}, f)
+    os.replace(latest_tmp, os.path.join(output_dir, LATEST_FILE))
+
+    print(f"Wrote {len(routes)} responses to {version_dir}")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render the finite API responses into a static snapshot")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--processed-csv", default=None, help="defaults to the file ingest_data.py loads")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    export_snapshot(args.output_dir, args.processed_csv, args.workers)
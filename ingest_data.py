@@ -2,6 +2,8 @@ import os
 import pandas as pd
 import json
 from sqlalchemy import create_engine, text
+from db_loader import load_tables, DEFAULT_CHUNKSIZE
+from olap_cube import OlapCube
 
 # PostgreSQL configuration
 DB_USER = "food_r5q8_user"
@@ -21,6 +23,13 @@ CSV_FILES = {
 # Path to JSON file
 JSON_FILE = "processed_data/top_producers.json"
 
+# Precomputed aggregate cube served by /api/aggregate
+CUBE_FILE = "processed_data/olap_cube.npz"
+
+# Loader tuning: rows per INSERT batch and concurrent table loads
+LOAD_CHUNKSIZE = int(os.environ.get("LOAD_CHUNKSIZE", DEFAULT_CHUNKSIZE))
+LOAD_WORKERS = int(os.environ.get("LOAD_WORKERS", 5))
+
 # Global database connection string
 DEFAULT_CONNECTION_STRING = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/postgres"
 DATABASE_EXISTS_CHECK_STRING = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
@@ -48,18 +57,16 @@ def create_database():
         print(f"Database '{DB_NAME}' already exists.")
 
 
-def load_csv_to_table(table_name, csv_path, if_exists="replace"):
+def read_csv_table(csv_path):
     df = pd.read_csv(csv_path)
 
-    # Round float columns
+    # Round float columns; nullable Int64 keeps missing values as NULLs
     for col in df.select_dtypes(include=['float64']).columns:
-        df[col] = df[col].round(0).astype(int)
-
-    df.to_sql(table_name, con=engine_target, if_exists=if_exists, index=False)
-    print(f"Loaded {csv_path} into table: {table_name}")
+        df[col] = df[col].round(0).astype('Int64')
+    return df
 
 
-def load_json_to_table(table_name, json_path):
+def read_json_table(json_path):
     with open(json_path, 'r') as f:
         data = json.load(f)
 
@@ -72,9 +79,13 @@ def load_json_to_table(table_name, json_path):
                 'production': production
             })
 
-    df = pd.DataFrame(records)
-    df.to_sql(table_name, con=engine_target, if_exists='replace', index=False)
-    print(f"Loaded {json_path} into table: {table_name}")
+    return pd.DataFrame(records)
+
+
+def build_cube(csv_path, cube_path):
+    cube = OlapCube.from_frame(read_csv_table(csv_path))
+    cube.save(cube_path)
+    print(f"Saved aggregate cube for {len(cube.measures)} measures to {cube_path}")
 
 
 if __name__ == "__main__":
@@ -83,12 +94,17 @@ if __name__ == "__main__":
     # Step 1: Create the database if not exists
     create_database()
 
-    # Step 2: Load tables
-    load_csv_to_table("processed_data", CSV_FILES["processed"])
-    load_csv_to_table("yearly_production", CSV_FILES["yearly"])
-    load_csv_to_table("decade_production", CSV_FILES["decade"])
-    load_csv_to_table("food_stats", CSV_FILES["stats"])
-    load_json_to_table("top_producers", JSON_FILE)
+    # Step 2: Load the independent tables concurrently
+    load_tables(engine_target, {
+        "processed_data": lambda: read_csv_table(CSV_FILES["processed"]),
+        "yearly_production": lambda: read_csv_table(CSV_FILES["yearly"]),
+        "decade_production": lambda: read_csv_table(CSV_FILES["decade"]),
+        "food_stats": lambda: read_csv_table(CSV_FILES["stats"]),
+        "top_producers": lambda: read_json_table(JSON_FILE),
+    }, chunksize=LOAD_CHUNKSIZE, max_workers=LOAD_WORKERS)
+
+    # Step 3: Precompute the partial-aggregate cube
+    build_cube(CSV_FILES["processed"], CUBE_FILE)
 
     print("Database setup complete!")
 
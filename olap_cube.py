@@ -0,0 +1,212 @@
+import numpy as np
+
+DIMENSIONS = ('entity', 'year', 'decade')
+PARTIALS = ('sum', 'count', 'min', 'max', 'sumsq')
+AGGREGATIONS = ('sum', 'count', 'min', 'max', 'avg', 'var', 'std')
+
+# Cuboids materialised at ingest, keyed by their group-by dimensions.
+# Year determines decade, so cuboids grouped by year also carry the decade key.
+CUBOIDS = {
+    (): (),
+    ('entity',): ('entity',),
+    ('year',): ('year', 'decade'),
+    ('decade',): ('decade',),
+    ('entity', 'year'): ('entity', 'year', 'decade'),
+    ('entity', 'decade'): ('entity', 'decade'),
+}
+
+
+def _combine(keys, partials, group_dims):
+    """Merge partial aggregates that share the same ``group_dims`` key values.
+
+    ``keys`` maps dimension -> 1-D key array and ``partials`` maps partial
+    name -> (rows, measures) array. Returns the grouped keys and partials.
+    """
+    n_rows = len(partials['count'])
+    if group_dims:
+        stacked = np.column_stack([keys[dim] for dim in group_dims])
+        unique_keys, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+    else:
+        unique_keys, inverse = np.zeros((1 if n_rows else 0, 0), dtype=np.int64), np.zeros(n_rows, dtype=np.int64)
+
+    order = np.argsort(inverse, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0]) if n_rows else np.array([], dtype=np.int64)
+    combined = {}
+    for name in PARTIALS:
+        values = partials[name][order]
+        if not n_rows:
+            combined[name] = values
+        elif name == 'min':
+            combined[name] = np.fmin.reduceat(values, starts, axis=0)
+        elif name == 'max':
+            combined[name] = np.fmax.reduceat(values, starts, axis=0)
+        else:
+            combined[name] = np.add.reduceat(values, starts, axis=0)
+    grouped_keys = {dim: unique_keys[:, i] for i, dim in enumerate(group_dims)}
+    return grouped_keys, combined
+
+
+class OlapCube:
+    """Partial aggregates (sum, count, min, max, sumsq) of every product measure
+    over the entity / year / decade lattice, combined in memory at query time.
+    """
+
+    def __init__(self, entities, measures, cuboids):
+        self.entities = np.asarray(entities)
+        self.entity_index = {entity: i for i, entity in enumerate(self.entities)}
+        self.measures = list(measures)
+        self.measure_index = {measure: i for i, measure in enumerate(self.measures)}
+        self.cuboids = cuboids
+
+    @classmethod
+    def from_frame(cls, df, entity_col='Entity', year_col='Year', measures=None):
+        """Build every cuboid from a processed (entity, year, products...) frame."""
+        measures = list(measures or [col for col in df.columns if '_Production' in col])
+        entities, entity_codes = np.unique(df[entity_col].astype(str).to_numpy(), return_inverse=True)
+        years = df[year_col].to_numpy(dtype=np.int64)
+        values = df[measures].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+
+        # Each source row is a partial aggregate of a single observation
+        base_keys = {'entity': entity_codes.ravel(), 'year': years, 'decade': years // 10 * 10}
+        base = {
+            'sum': np.where(valid, values, 0.0),
+            'count': valid.astype(np.float64),
+            'min': values,
+            'max': values,
+            'sumsq': np.where(valid, values * values, 0.0),
+        }
+        finest_keys, finest = _combine(base_keys, base, ('entity', 'year'))
+        finest_keys['decade'] = finest_keys['year'] // 10 * 10
+
+        cuboids = {}
+        for group_dims, key_dims in CUBOIDS.items():
+            keys, partials = _combine(finest_keys, finest, group_dims)
+            if 'year' in group_dims:
+                keys['decade'] = keys['year'] // 10 * 10
+            cuboids[group_dims] = ({dim: keys[dim] for dim in key_dims}, partials)
+        return cls(entities, measures, cuboids)
+
+    def save(self, path):
+        arrays = {'entities': self.entities.astype(str), 'measures': np.asarray(self.measures, dtype=str)}
+        for group_dims, (keys, partials) in self.cuboids.items():
+            prefix = '+'.join(group_dims) or 'all'
+            for dim, key in keys.items():
+                arrays[f"{prefix}/key/{dim}"] = key
+            for name, partial in partials.items():
+                arrays[f"{prefix}/{name}"] = partial
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            cuboids = {}
+            for group_dims, key_dims in CUBOIDS.items():
+                prefix = '+'.join(group_dims) or 'all'
+                keys = {dim: data[f"{prefix}/key/{dim}"] for dim in key_dims}
+                partials = {name: data[f"{prefix}/{name}"] for name in PARTIALS}
+                cuboids[group_dims] = (keys, partials)
+            return cls(data['entities'], data['measures'].tolist(), cuboids)
+
+    def _smallest_cuboid(self, needed):
+        candidates = [
+            (len(partials['count']), group_dims)
+            for group_dims, (keys, partials) in self.cuboids.items()
+            if needed <= set(keys)
+        ]
+        return min(candidates)[1]
+
+    def query(self, group_by=(), measures=None, aggs=('sum',), filters=None):
+        """Aggregate ``measures`` by ``group_by`` dimensions.
+
+        ``filters`` maps a dimension to a collection of allowed values, and
+        'year' may also be given as a (min, max) bound via 'year_min' /
+        'year_max'. Raises ValueError for unknown dimensions, measures,
+        aggregations or entities. Returns a list of records.
+        """
+        unknown = (set(group_by) - set(DIMENSIONS)) | (set(filters or {}) - set(DIMENSIONS) - {'year_min', 'year_max'})
+        if unknown:
+            raise ValueError(f"Unknown dimension(s): {', '.join(sorted(unknown))}")
+        measures = list(measures or self.measures)
+        bad_measures = [m for m in measures if m not in self.measure_index]
+        if bad_measures:
+            raise ValueError(f"Unknown measure(s): {', '.join(bad_measures)}")
+        bad_aggs = [a for a in aggs if a not in AGGREGATIONS]
+        if bad_aggs:
+            raise ValueError(f"Unknown aggregation(s): {', '.join(bad_aggs)}")
+
+        group_by = tuple(dim for dim in DIMENSIONS if dim in group_by)
+        filters = dict(filters or {})
+        if 'entity' in filters:
+            missing = [e for e in filters['entity'] if e not in self.entity_index]
+            if missing:
+                raise ValueError(f"Unknown entity: {', '.join(missing)}")
+            filters['entity'] = [self.entity_index[e] for e in filters['entity']]
+
+        needed = set(group_by) | {'year' if dim.startswith('year') else dim for dim in filters}
+        cuboid = self._smallest_cuboid(needed)
+        keys, partials = self.cuboids[cuboid]
+
+        columns = [self.measure_index[m] for m in measures]
+        if filters:
+            mask = np.ones(len(partials['count']), dtype=bool)
+            for dim, allowed in filters.items():
+                if dim == 'year_min':
+                    mask &= keys['year'] >= allowed
+                elif dim == 'year_max':
+                    mask &= keys['year'] <= allowed
+                else:
+                    mask &= np.isin(keys[dim], list(allowed))
+            keys = {dim: key[mask] for dim, key in keys.items()}
+            partials = {name: partial[mask][:, columns] for name, partial in partials.items()}
+        else:
+            partials = {name: partial[:, columns] for name, partial in partials.items()}
+
+        # Rows of a cuboid are already unique and sorted by its own dimensions
+        if cuboid == group_by:
+            grouped_keys, combined = keys, partials
+        else:
+            grouped_keys, combined = _combine(keys, partials, group_by)
+        results = _finalise(combined, aggs)
+
+        # Build column lists once, then zip them into records
+        key_columns = [
+            (dim, self.entities[grouped_keys[dim]].tolist() if dim == 'entity' else grouped_keys[dim].tolist())
+            for dim in group_by
+        ]
+        measure_columns = [
+            (measure, [(agg, _to_json_list(results[agg][:, i])) for agg in aggs])
+            for i, measure in enumerate(measures)
+        ]
+        records = []
+        for row in range(len(combined['count'])):
+            record = {dim: values[row] for dim, values in key_columns}
+            for measure, agg_columns in measure_columns:
+                record[measure] = {agg: values[row] for agg, values in agg_columns}
+            records.append(record)
+        return records
+
+
+def _finalise(partials, aggs):
+    """Turn combined partials into the requested aggregation arrays."""
+    count = partials['count']
+    results = {}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for agg in aggs:
+            if agg in ('sum', 'count', 'min', 'max'):
+                results[agg] = partials[agg]
+            elif agg == 'avg':
+                results[agg] = partials['sum'] / count
+            else:
+                var = (partials['sumsq'] - partials['sum'] ** 2 / count) / (count - 1)
+                var = np.where(count > 1, np.maximum(var, 0.0), np.nan)
+                results[agg] = var if agg == 'var' else np.sqrt(var)
+    return results
+
+
+def _to_json_list(values):
+    """Convert a float column to a list with NaN mapped to None."""
+    converted = values.astype(object)
+    converted[np.isnan(values)] = None
+    return converted.tolist()
@@ -5,159 +5,260 @@ import logging
 from datetime import datetime
 import json
 import re
+from structured_logging import setup_logging, log_event
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("data_processing.log"),
-        logging.StreamHandler()
-    ]
-)
+# Configure non-blocking logging; set LOG_LEVEL=DEBUG for per-column and per-food detail,
+# and LOG_FILE to redirect the log file (an empty value logs to stderr only)
 logger = logging.getLogger(__name__)
+setup_logging(logger, os.environ.get("LOG_FILE", "data_processing.log"), level=os.environ.get("LOG_LEVEL", "INFO"))
+
+# Row labels of the describe-style summary, in the order pandas uses
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+FLOOR_QUANTILE = 0.01
+
+
+def _sorted_quantiles(sorted_matrix, counts, qs):
+    """Linear-interpolated quantiles (numpy/pandas default) from column-sorted data.
+
+    ``sorted_matrix`` holds each column sorted ascending with NaNs last, and
+    ``counts`` the number of non-NaN values per column.
+    """
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    last = np.maximum(counts - 1, 0)
+    positions = qs[:, None] * last[None, :]
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.minimum(lower + 1, last[None, :])
+    fraction = positions - lower
+    cols = np.arange(sorted_matrix.shape[1])
+    below = sorted_matrix[lower, cols]
+    above = sorted_matrix[upper, cols]
+    result = below + (above - below) * fraction
+    result[:, counts == 0] = np.nan
+    return result
+
+
+def _group_partials(matrix, codes, n_groups):
+    """Per-group NaN-aware sums and counts for every column in one bincount each."""
+    n_cols = matrix.shape[1]
+    valid = ~np.isnan(matrix)
+    flat = (codes[:, None] * n_cols + np.arange(n_cols)).ravel()
+    sums = np.bincount(flat, weights=np.where(valid, matrix, 0.0).ravel(), minlength=n_groups * n_cols)
+    counts = np.bincount(flat, weights=valid.ravel(), minlength=n_groups * n_cols)
+    return sums.reshape(n_groups, n_cols), counts.reshape(n_groups, n_cols)
+
+
+def compute_product_statistics(matrix, years, floor_quantile=FLOOR_QUANTILE):
+    """Clip, round and summarise a (rows, products) matrix in a batched pass.
+
+    Negative values are set to 0 and each column is floored at its
+    ``floor_quantile`` before rounding. Returns the cleaned matrix together
+    with the describe-style summary (rows in ``DESCRIBE_INDEX`` order) and
+    the per-year and per-decade means.
+    """
+    matrix = np.maximum(np.asarray(matrix, dtype=np.float64), 0.0)  # NaNs propagate
+    counts = (~np.isnan(matrix)).sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # A single column sort serves the floor, the quartiles and min/max:
+        # clipping and rounding are monotone, so the sort order survives them
+        sorted_matrix = np.sort(matrix, axis=0)
+        floor = _sorted_quantiles(sorted_matrix, counts, floor_quantile)[0]
+        matrix = np.round(np.maximum(matrix, floor))
+        sorted_matrix = np.round(np.maximum(sorted_matrix, floor))
+        quartiles = _sorted_quantiles(sorted_matrix, counts, [0.25, 0.5, 0.75])
+        cols = np.arange(matrix.shape[1])
+        col_min = np.where(counts > 0, sorted_matrix[0], np.nan)
+        col_max = np.where(counts > 0, sorted_matrix[np.maximum(counts - 1, 0), cols], np.nan)
+
+        # Year partials feed the yearly means, the decade means and the overall mean
+        year_values, year_codes = np.unique(years, return_inverse=True)
+        year_sums, year_counts = _group_partials(matrix, year_codes.ravel(), len(year_values))
+        decade_values, decade_codes = np.unique(year_values // 10 * 10, return_inverse=True)
+        decade_sums = _group_partials(year_sums, decade_codes.ravel(), len(decade_values))[0]
+        decade_counts = _group_partials(year_counts, decade_codes.ravel(), len(decade_values))[0]
+
+        mean = year_sums.sum(axis=0) / counts
+        std = np.sqrt(np.nansum((matrix - mean) ** 2, axis=0) / (counts - 1))
+        std[counts < 2] = np.nan
+
+        return {
+            'matrix': matrix,
+            'floor': floor,
+            'describe': np.vstack([counts.astype(np.float64), mean, std, col_min, quartiles, col_max]),
+            'years': year_values,
+            'year_means': year_sums / year_counts,
+            'decades': decade_values,
+            'decade_means': decade_sums / decade_counts,
+        }
+
+
+def clean_frame(df):
+    """Normalise column names, coerce year/production columns and drop exact duplicates.
+
+    Returns (df, entity_col, year_col, numeric_cols, initial_count), where
+    initial_count is the row count before duplicates were removed.
+    """
+    # Clean column names
+    original_columns = df.columns.tolist()
+    df.columns = [re.sub(r'\s+', '_', col.strip()) for col in df.columns]  # Replace spaces with underscores
+    df.columns = [re.sub(r'\(.*?\)', '', col) for col in df.columns]  # Remove parentheses and their contents
+    df.columns = [col.strip('_') for col in df.columns]  # Strip leading/trailing underscores
+    df.columns = [col.replace('__', '_') for col in df.columns]  # Replace double underscores with single
+    log_event(logger, logging.DEBUG, "columns_renamed",
+              columns=lambda: df.columns.tolist(), original=original_columns)
+
+    # Identify columns
+    entity_col = next((col for col in df.columns if 'entity' in col.lower()), 'Entity')
+    year_col = next((col for col in df.columns if 'year' in col.lower()), 'Year')
+
+    # Convert year to numeric and drop invalid
+    df[year_col] = pd.to_numeric(df[year_col], errors='coerce')
+    df = df[df[year_col].between(1900, datetime.now().year)]
+    df[year_col] = df[year_col].astype('int')
+
+    # Identify numeric production columns
+    numeric_cols = [col for col in df.columns if 'production' in col.lower()]
+    for col in numeric_cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Remove exact duplicates
+    initial_count = len(df)
+    df = df.drop_duplicates()
+    log_event(logger, logging.INFO, "duplicates_removed", count=initial_count - len(df))
+    return df, entity_col, year_col, numeric_cols, initial_count
+
+
+def select_top_producers(df, entity_col, year_col, numeric_cols):
+    """Top 10 producers of each food in the latest year, extended to include ties."""
+    latest_year = df[year_col].max()
+    latest_data = df[df[year_col] == latest_year]
+    top_producers = {}
+
+    for food in numeric_cols:
+        # Sort values and reset index to get proper ordering
+        sorted_data = latest_data[[entity_col, food]].sort_values(by=food, ascending=False).reset_index(drop=True)
+
+        # Take top 10, but extend if there are ties
+        top = sorted_data.head(10)
+
+        # If the 10th value is the same as some of the next values, include them
+        if len(sorted_data) > 10:
+            tenth_value = top.iloc[9][food]
+            # Find all rows with the same value as the 10th
+            ties = sorted_data[sorted_data[food] == tenth_value]
+            if len(ties) > 1:
+                # Include all ties
+                max_index = sorted_data[sorted_data[food] == tenth_value].index.max()
+                top = sorted_data.iloc[:max_index + 1]
+
+        # Convert to dictionary
+        top_producers[food] = top.set_index(entity_col)[food].to_dict()
+
+        # Log the results for debugging (lists are only built at DEBUG)
+        log_event(logger, logging.DEBUG, "top_producers", food=food, count=len(top),
+                  entities=lambda: top[entity_col].tolist(), values=lambda: top[food].tolist())
+    return top_producers
+
+
+def save_outputs(df, entity_col, year_col, numeric_cols, product_stats, top_producers,
+                 initial_count, output_dir):
+    """Write the processed data, statistics, aggregates, top producers and preservation report.
+
+    Adds the ``decade`` column to ``df`` in place. Returns {artifact: path},
+    keyed like ingest_data.CSV_FILES plus 'top_producers' and 'report'.
+    """
+    paths = {}
+
+    # Save cleaned data
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    paths['processed'] = os.path.join(output_dir, f"processed_{timestamp}.csv")
+    df.to_csv(paths['processed'], index=False)
+    log_event(logger, logging.INFO, "saved", artifact="processed_data", path=paths['processed'], rows=len(df))
+
+    # 1. Basic statistics
+    stats_df = pd.DataFrame(product_stats['describe'], index=DESCRIBE_INDEX, columns=numeric_cols).round(0)
+    paths['stats'] = os.path.join(output_dir, "food_production_statistics.csv")
+    stats_df.to_csv(paths['stats'])
+    log_event(logger, logging.INFO, "saved", artifact="statistics", path=paths['stats'])
+
+    # 2. Time series aggregation
+    if year_col in df.columns and entity_col in df.columns:
+        yearly_prod = pd.DataFrame(product_stats['year_means'], columns=numeric_cols).round(0)
+        yearly_prod.insert(0, year_col, product_stats['years'])
+        paths['yearly'] = os.path.join(output_dir, "yearly_production.csv")
+        yearly_prod.to_csv(paths['yearly'], index=False)
+        log_event(logger, logging.INFO, "saved", artifact="yearly_production", path=paths['yearly'])
+
+        # Create a decade column for aggregation only
+        df['decade'] = (df[year_col] // 10 * 10).astype('Int64')
+        decade_prod = pd.DataFrame(product_stats['decade_means'], columns=numeric_cols).round(0)
+        decade_prod.insert(0, 'decade', pd.array(product_stats['decades'], dtype='Int64'))
+        paths['decade'] = os.path.join(output_dir, "decade_production.csv")
+        decade_prod.to_csv(paths['decade'], index=False)
+        log_event(logger, logging.INFO, "saved", artifact="decade_production", path=paths['decade'])
+
+    # 3. Top producers by food type - with unique values
+    if top_producers is not None:
+        paths['top_producers'] = os.path.join(output_dir, "top_producers.json")
+        with open(paths['top_producers'], 'w') as f:
+            json.dump(top_producers, f, indent=4)
+        log_event(logger, logging.INFO, "saved", artifact="top_producers", path=paths['top_producers'])
+
+    # Preservation stats
+    preservation_stats = {
+        'original_rows': initial_count,
+        'final_rows': len(df),
+        'duplicates_removed': initial_count - len(df),
+        'columns_preserved': list(df.columns)
+    }
+    paths['report'] = os.path.join(output_dir, f"preservation_report_{timestamp}.json")
+    with open(paths['report'], 'w') as f:
+        json.dump(preservation_stats, f, indent=4)
+    log_event(logger, logging.INFO, "saved", artifact="preservation_report", path=paths['report'])
+    return paths
 
 
 def clean_and_process_data(input_file="world food production.csv", output_dir="processed_data"):
     try:
         os.makedirs(output_dir, exist_ok=True)
-        logger.info(f"Output directory: {output_dir}")
+        log_event(logger, logging.INFO, "output_directory", path=output_dir)
 
-        logger.info(f"Loading data from {input_file}")
+        log_event(logger, logging.INFO, "loading_data", path=input_file)
         try:
             df = pd.read_csv(input_file)
-            logger.info(f"Successfully loaded data with shape: {df.shape}")
+            log_event(logger, logging.INFO, "data_loaded", rows=df.shape[0], columns=df.shape[1])
         except Exception as e:
-            logger.error(f"Error loading data: {e}")
+            log_event(logger, logging.ERROR, "load_failed", path=input_file, error=str(e))
             return None
 
-        # Clean column names
-        original_columns = df.columns.tolist()
-        df.columns = [re.sub(r'\s+', '_', col.strip()) for col in df.columns]  # Replace spaces with underscores
-        df.columns = [re.sub(r'\(.*?\)', '', col) for col in df.columns]  # Remove parentheses and their contents
-        df.columns = [col.strip('_') for col in df.columns]  # Strip leading/trailing underscores
-        df.columns = [col.replace('__', '_') for col in df.columns]  # Replace double underscores with single
-        logger.info(f"Modified columns: {df.columns.tolist()}")
-        logger.info(f"Original columns were: {original_columns}")
-
-        # Identify columns
-        entity_col = next((col for col in df.columns if 'entity' in col.lower()), 'Entity')
-        year_col = next((col for col in df.columns if 'year' in col.lower()), 'Year')
-
-        # Convert year to numeric and drop invalid
-        df[year_col] = pd.to_numeric(df[year_col], errors='coerce')
-        df = df[df[year_col].between(1900, datetime.now().year)]
-        df[year_col] = df[year_col].astype('int')
-
-        # Identify numeric production columns
-        numeric_cols = [col for col in df.columns if 'production' in col.lower()]
-        for col in numeric_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # Remove exact duplicates
-        initial_count = len(df)
-        df = df.drop_duplicates()
-        logger.info(f"Removed {initial_count - len(df)} exact duplicates")
-
-        # Handle outliers more carefully - preserve top producers
-        for col in numeric_cols:
-            if df[col].dtype in [np.float64, np.int64]:
-                # Log transformation to handle extreme values
-                df[col] = np.where(df[col] < 0, 0, df[col])  # Set negative values to 0
-
-                # Only cap at floor (don't cap the top performers)
-                floor = df[col].quantile(0.01)
-                df[col] = np.where(df[col] < floor, floor, df[col])
-
-                # Log the data range after processing
-                logger.info(f"Data range for {col}: min={df[col].min():.0f}, max={df[col].max():.0f}")
-
-        # Round all production-related numbers
-        df = df.round({col: 0 for col in numeric_cols})
-        logger.info("Rounded all production values to rounded number")
-
-        # Save cleaned data
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-        output_path = os.path.join(output_dir, f"processed_{timestamp}.csv")
-        df.to_csv(output_path, index=False)
-        logger.info(f"Saved processed data to {output_path}")
-
-        # 1. Basic statistics
-        stats_df = df[numeric_cols].describe().round(0)
-        stats_file = os.path.join(output_dir, "food_production_statistics.csv")
-        stats_df.to_csv(stats_file)
-        logger.info(f"Saved basic statistics to {stats_file}")
-
-        # 2. Time series aggregation
-        if year_col in df.columns and entity_col in df.columns:
-            yearly_prod = df.groupby(year_col)[numeric_cols].mean().reset_index()
-            yearly_prod[numeric_cols] = yearly_prod[numeric_cols].round(0)
-            yearly_file = os.path.join(output_dir, "yearly_production.csv")
-            yearly_prod.to_csv(yearly_file, index=False)
-            logger.info(f"Saved yearly aggregation to {yearly_file}")
-
-            # Create a decade column for aggregation only
-            df['decade'] = (df[year_col] // 10 * 10).astype('Int64')
-            decade_prod = df.groupby('decade')[numeric_cols].mean().reset_index()
-            decade_prod[numeric_cols] = decade_prod[numeric_cols].round(0)
-            decade_file = os.path.join(output_dir, "decade_production.csv")
-            decade_prod.to_csv(decade_file, index=False)
-            logger.info(f"Saved decade aggregation to {decade_file}")
-
-        # 3. Top producers by food type - with unique values
+        df, entity_col, year_col, numeric_cols, initial_count = clean_frame(df)
+
+        # Clip, round and summarise every production column in one batched pass
+        years = df[year_col].to_numpy()
+        matrix = df[numeric_cols].to_numpy(dtype=np.float64)
+        product_stats = compute_product_statistics(matrix, years)
+        df[numeric_cols] = product_stats['matrix']
+        for col, col_min, col_max in zip(numeric_cols, product_stats['describe'][3], product_stats['describe'][7]):
+            # Lambdas defer the rounding to DEBUG and keep all-NaN columns safe
+            log_event(logger, logging.DEBUG, "data_range", column=col,
+                      min=lambda v=col_min: None if np.isnan(v) else round(v),
+                      max=lambda v=col_max: None if np.isnan(v) else round(v))
+        log_event(logger, logging.INFO, "values_rounded", columns=len(numeric_cols))
+
+        # Top producers of each food in the latest year
+        top_producers = None
         if entity_col in df.columns:
-            latest_year = df[year_col].max()
-            latest_data = df[df[year_col] == latest_year]
-            top_producers = {}
-
-            for food in numeric_cols:
-                # Sort values and reset index to get proper ordering
-                sorted_data = latest_data[[entity_col, food]].sort_values(by=food, ascending=False).reset_index(drop=True)
-
-                # Take top 10, but extend if there are ties
-                top = sorted_data.head(10)
-
-                # If the 10th value is the same as some of the next values, include them
-                if len(sorted_data) > 10:
-                    tenth_value = top.iloc[9][food]
-                    # Find all rows with the same value as the 10th
-                    ties = sorted_data[sorted_data[food] == tenth_value]
-                    if len(ties) > 1:
-                        # Include all ties
-                        max_index = sorted_data[sorted_data[food] == tenth_value].index.max()
-                        top = sorted_data.iloc[:max_index + 1]
-
-                # Convert to dictionary
-                top_producers[food] = top.set_index(entity_col)[food].to_dict()
-
-                # Log the results for debugging
-                logger.info(f"Top {len(top)} producers for {food}: {top[entity_col].tolist()}")
-                logger.info(f"Production values: {top[food].tolist()}")
-
-            top_file = os.path.join(output_dir, "top_producers.json")
-            with open(top_file, 'w') as f:
-                json.dump(top_producers, f, indent=4)
-            logger.info(f"Saved top producers to {top_file}")
-
-        # Preservation stats
-        preservation_stats = {
-            'original_rows': initial_count,
-            'final_rows': len(df),
-            'duplicates_removed': initial_count - len(df),
-            'columns_preserved': list(df.columns)
-        }
-        report_path = os.path.join(output_dir, f"preservation_report_{timestamp}.json")
-        with open(report_path, 'w') as f:
-            json.dump(preservation_stats, f, indent=4)
-        logger.info(f"Saved preservation report to {report_path}")
+            top_producers = select_top_producers(df, entity_col, year_col, numeric_cols)
 
+        save_outputs(df, entity_col, year_col, numeric_cols, product_stats, top_producers,
+                     initial_count, output_dir)
         return df
 
     except Exception as e:
-        logger.error(f"Processing failed: {str(e)}", exc_info=True)
+        log_event(logger, logging.ERROR, "processing_failed", exc_info=True, error=str(e))
         return None
 
 
 if __name__ == "__main__":
     processed_data = clean_and_process_data()
-    logger.info("Processing completed" if processed_data is not None else "Processing failed")
\ No newline at end of file
+    log_event(logger, logging.INFO, "processing_completed" if processed_data is not None else "processing_failed")
\ No newline at end of file
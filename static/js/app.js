@@ -24,6 +24,9 @@ const domElements = {
 // Base URL for API requests
 const BASE_URL = 'https://cmp419-unit2.onrender.com';
 
+// Pre-rendered API snapshot (export_static.py); point this at the CDN origin to bypass the app
+const SNAPSHOT_BASE_URL = `${BASE_URL}/snapshot`;
+
 // Initialization
 async function initializeDashboard() {
     try {
@@ -36,6 +39,26 @@ async function initializeDashboard() {
     }
 }
 
+// Load the latest snapshot manifest once; resolves to null when no snapshot is published
+const snapshotManifest = (async () => {
+    try {
+        const latest = await (await fetch(`${SNAPSHOT_BASE_URL}/latest.json`)).json();
+        const base = `${SNAPSHOT_BASE_URL}/${latest.version}`;
+        const manifest = await (await fetch(`${base}/manifest.json`)).json();
+        return { base, routes: manifest.routes };
+    } catch (error) {
+        console.warn('API snapshot unavailable, using live API:', error);
+        return null;
+    }
+})();
+
+// Utility: Resolve an API path to its snapshot object, falling back to the live API
+async function resolveApiUrl(path) {
+    const manifest = await snapshotManifest;
+    const object = manifest && manifest.routes[decodeURIComponent(path)];
+    return object ? `${manifest.base}/${object}` : `${BASE_URL}${path}`;
+}
+
 // Utility: Fetch JSON data from a URL
 async function fetchData(url) {
     const response = await fetch(url);
@@ -196,7 +219,7 @@ async function updateMapChart() {
 
     try {
         const data = await fetchData(
-            `${BASE_URL}/api/map/${currentFilters.year}/${currentFilters.product}`
+            await resolveApiUrl(`/api/map/${currentFilters.year}/${currentFilters.product}`)
         );
         // Get selected country index for highlighting
         const selectedCountryIndex = data.findIndex(d => d.Entity === currentFilters.country);
@@ -350,7 +373,7 @@ async function updateMapChart() {
 // Function to update the stacked chart
 async function updateStackedChart(year) {
     try {
-            const response = await fetch(`${BASE_URL}/api/stacked/${year}`);
+            const response = await fetch(await resolveApiUrl(`/api/stacked/${year}`));
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -471,7 +494,8 @@ function updateDecadeChart() {
     }
 
     // Construct the fetch URL with the product parameter
-    fetch(`${BASE_URL}/api/data/decade?product=${product}`)
+    resolveApiUrl(`/api/data/decade?product=${product}`)
+        .then(url => fetch(url))
         .then(res => {
             if (!res.ok) {
                 throw new Error(`HTTP error! status: ${res.status}`);
@@ -613,7 +637,8 @@ function updateStatsChart() {
         return;
     }
 
-    fetch(`${BASE_URL}/api/data/stats?product=${encodeURIComponent(product)}`)
+    resolveApiUrl(`/api/data/stats?product=${encodeURIComponent(product)}`)
+        .then(url => fetch(url))
         .then(res => {
             if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
             return res.json();
@@ -730,7 +755,7 @@ async function loadBubbleChart() {
 async function loadTopProducers() {
     try {
         const cropType = document.getElementById('productSelect').value || 'Maize_Production';
-        const response = await fetch(`${BASE_URL}/api/top_producers?crop_type=${encodeURIComponent(cropType)}`);
+        const response = await fetch(await resolveApiUrl(`/api/top_producers?crop_type=${encodeURIComponent(cropType)}`));
 
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
@@ -0,0 +1,100 @@
+import copy
+import json
+import math
+import queue
+import atexit
+import random
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE_MAX_BYTES = 1_000_000
+LOG_FILE_BACKUPS = 3
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Render records as ``time level logger event key=value ...`` lines."""
+
+    def format(self, record):
+        parts = [
+            self.formatTime(record),
+            f"level={record.levelname}",
+            f"logger={record.name}",
+            f"event={_quote(record.getMessage())}",
+        ]
+        for key, value in getattr(record, 'fields', {}).items():
+            parts.append(f"{key}={_quote(value)}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue the record as-is so all formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return copy.copy(record)
+
+
+def _quote(value):
+    """Render a field value: bare or quoted strings, and everything else as JSON once."""
+    if isinstance(value, str):
+        if value == "" or any(ch in value for ch in ' ="\n'):
+            return json.dumps(value)
+        return value
+    # Compact separators leave spaces only inside JSON strings, where \u0020 is
+    # equivalent, so every value stays a single whitespace-free token
+    text = json.dumps(_json_safe(value), default=str, separators=(',', ':'), allow_nan=False)
+    return text.replace(' ', '\\u0020')
+
+
+def _json_safe(value):
+    """Map NaN/inf to None and numpy scalars/arrays to plain Python values."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if hasattr(value, 'tolist'):
+        return _json_safe(value.tolist())
+    return value
+
+
+def setup_logging(logger, log_file=None, level=logging.INFO):
+    """Route ``logger`` through a queue so callers never block on log I/O.
+
+    A background QueueListener writes key/value lines to stderr and, when
+    ``log_file`` is given, to a size-capped rotating file.
+    """
+    formatter = KeyValueFormatter()
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.handlers = [_DeferredQueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return listener
+
+
+def log_event(logger, level, event, sample_rate=1.0, exc_info=False, **fields):
+    """Log ``event`` with key/value ``fields``, doing no work unless it will be emitted.
+
+    Callable field values are only evaluated once the level check and the
+    ``sample_rate`` draw have passed, so expensive values cost nothing when
+    filtered out.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return
+    fields = {key: value() if callable(value) else value for key, value in fields.items()}
+    logger.log(level, event, exc_info=exc_info, extra={'fields': fields}, stacklevel=2)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from correlation_engine import CorrelationEngine
+
+
+def _frame(seed=0, nan_rate=0.2):
+    rng = np.random.default_rng(seed)
+    entities = [f"E{i:03d}" for i in range(80)]
+    df = pd.DataFrame([(e, y) for y in (2000, 2001) for e in entities], columns=['Entity', 'Year'])
+    base = rng.lognormal(8, 2, (len(df), 1))
+    values = base * rng.lognormal(0, 1, (len(df), 4))
+    values[:, 3] = np.round(values[:, 3], -4)  # ties
+    values[rng.random(values.shape) < nan_rate] = np.nan
+    for k in range(4):
+        df[f"P{k}_Production"] = values[:, k]
+    return df
+
+
+def test_matrices_match_pandas_with_nans():
+    df = _frame()
+    engine = CorrelationEngine(df)
+    for year in (2000, 2001):
+        subset = df[df['Year'] == year][engine.products]
+        y = engine.year_index[year]
+        np.testing.assert_allclose(engine.pearson[y], subset.corr(), atol=1e-12)
+        np.testing.assert_allclose(engine.spearman[y], subset.corr(method='spearman'), atol=1e-12)
+
+
+def test_scatter_returns_requested_year():
+    df = _frame(nan_rate=0.0)
+    engine = CorrelationEngine(df)
+    records = engine.scatter('P0_Production', 'P1_Production', 2001)
+    expected = df[df['Year'] == 2001]
+    assert len(records) == len(expected)
+    assert records[0] == {
+        'Entity': 'E000',
+        'P0_Production': expected.iloc[0]['P0_Production'],
+        'P1_Production': expected.iloc[0]['P1_Production'],
+    }
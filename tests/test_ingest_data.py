@@ -0,0 +1,35 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+import sanitise
+from ingest_data import read_csv_table, read_json_table
+
+
+def test_sanitise_outputs_with_missing_values_are_readable(tmp_path, monkeypatch):
+    source = pd.DataFrame({
+        'Entity': ['A', 'B', 'C', 'A', 'B', 'C'],
+        'Year': [2000, 2000, 2000, 2001, 2001, 2001],
+        'Maize Production (tonnes)': [1.4, np.nan, 3.0, 4.0, 5.6, 6.0],
+        'Rice  Production ( tonnes)': [np.nan] * 6,
+    })
+    input_file = tmp_path / "input.csv"
+    source.to_csv(input_file, index=False)
+    monkeypatch.setattr(sanitise.logger, 'handlers', [logging.NullHandler()])
+
+    df, entity_col, year_col, numeric_cols, initial_count = sanitise.clean_frame(pd.read_csv(input_file))
+    stats = sanitise.compute_product_statistics(df[numeric_cols].to_numpy(dtype=np.float64),
+                                                df[year_col].to_numpy())
+    df[numeric_cols] = stats['matrix']
+    top_producers = sanitise.select_top_producers(df, entity_col, year_col, numeric_cols)
+    paths = sanitise.save_outputs(df, entity_col, year_col, numeric_cols, stats, top_producers,
+                                  initial_count, str(tmp_path))
+
+    processed = read_csv_table(paths['processed'])
+    assert str(processed['Maize_Production'].dtype) == 'Int64'
+    assert processed['Maize_Production'].isna().tolist() == [False, True, False, False, False, False]
+    assert processed['Rice_Production'].isna().all()
+    for name in ('yearly', 'decade', 'stats'):
+        assert len(read_csv_table(paths[name])) > 0
+    assert set(read_json_table(paths['top_producers'])['crop_type']) == set(numeric_cols)
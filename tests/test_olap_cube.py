@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from olap_cube import OlapCube
+
+
+def _frame(seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [(f"E{e:02d}", year) for e in range(12) for year in range(1985, 2006)]
+    df = pd.DataFrame(rows, columns=['Entity', 'Year'])
+    for name in ('Maize_Production', 'Rice_Production'):
+        values = rng.lognormal(8, 2, len(df))
+        values[rng.random(len(df)) < 0.1] = np.nan
+        df[name] = values
+    return df
+
+
+def _expected(df, group_cols, measure):
+    grouped = df.groupby(group_cols)[measure] if group_cols else df[measure]
+    return grouped.agg(['sum', 'count', 'min', 'max', 'mean', 'std'])
+
+
+@pytest.mark.parametrize("group_by, filters, group_cols, mask", [
+    (['entity', 'year'], {}, ['Entity', 'Year'], None),
+    (['decade'], {}, ['decade'], None),
+    (['entity'], {'year_min': 1995}, ['Entity'], lambda df: df['Year'] >= 1995),
+    (['year'], {'entity': ['E03', 'E07'], 'decade': [1990]}, ['Year'],
+     lambda df: df['Entity'].isin(['E03', 'E07']) & (df['decade'] == 1990)),
+])
+def test_query_matches_pandas(group_by, filters, group_cols, mask):
+    df = _frame().assign(decade=lambda d: d['Year'] // 10 * 10)
+    cube = OlapCube.from_frame(df.drop(columns='decade'))
+    records = cube.query(group_by=group_by, measures=['Maize_Production'],
+                         aggs=['sum', 'count', 'min', 'max', 'avg', 'std'], filters=filters)
+
+    subset = df[mask(df)] if mask else df
+    expected = _expected(subset, group_cols, 'Maize_Production').reset_index()
+    assert len(records) == len(expected)
+    for record, (_, row) in zip(records, expected.iterrows()):
+        for dim, col in zip(group_by, group_cols):
+            assert record[dim] == row[col]
+        result = record['Maize_Production']
+        np.testing.assert_allclose(
+            [np.nan if result[agg] is None else result[agg] for agg in ('sum', 'count', 'min', 'max', 'avg', 'std')],
+            [row['sum'], row['count'], row['min'], row['max'], row['mean'], row['std']],
+            rtol=1e-9,
+        )
+
+
+def test_grand_total_and_missing_values():
+    df = _frame()
+    df.loc[df['Entity'] == 'E00', 'Rice_Production'] = np.nan
+    cube = OlapCube.from_frame(df)
+    total = cube.query(measures=['Rice_Production'], aggs=['sum'])
+    assert total == [{'Rice_Production': {'sum': pytest.approx(df['Rice_Production'].sum())}}]
+    e00 = cube.query(group_by=['entity'], measures=['Rice_Production'], aggs=['avg'], filters={'entity': ['E00']})
+    assert e00 == [{'entity': 'E00', 'Rice_Production': {'avg': None}}]
+
+
+@pytest.mark.parametrize("kwargs", [
+    {'group_by': ['country']},
+    {'measures': ['Tea_Production']},
+    {'aggs': ['median']},
+    {'filters': {'entity': ['Atlantis']}},
+])
+def test_invalid_queries_raise_value_error(kwargs):
+    with pytest.raises(ValueError):
+        OlapCube.from_frame(_frame()).query(**kwargs)
@@ -0,0 +1,74 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+import sanitise
+from structured_logging import KeyValueFormatter
+
+
+def _synthetic(seed=0, rows=5000, cols=6):
+    rng = np.random.default_rng(seed)
+    matrix = rng.lognormal(10, 3, (rows, cols))
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    matrix[:50, 0] = -5.0
+    matrix[:, -1] = np.nan  # an all-NaN product column
+    years = rng.integers(1961, 2022, rows)
+    return matrix, years
+
+
+def test_floor_matches_np_quantile():
+    matrix, years = _synthetic()
+    stats = sanitise.compute_product_statistics(matrix, years)
+    expected = np.nanquantile(np.maximum(matrix[:, :-1], 0.0), sanitise.FLOOR_QUANTILE, axis=0)
+    np.testing.assert_allclose(stats['floor'][:-1], expected, rtol=1e-12)
+    assert np.isnan(stats['floor'][-1])
+
+
+def test_describe_matches_pandas():
+    matrix, years = _synthetic(seed=1)
+    stats = sanitise.compute_product_statistics(matrix, years)
+    expected = pd.DataFrame(stats['matrix']).describe().to_numpy()
+    np.testing.assert_allclose(stats['describe'], expected, rtol=1e-9, equal_nan=True)
+
+
+def test_group_means_match_pandas():
+    matrix, years = _synthetic(seed=2)
+    stats = sanitise.compute_product_statistics(matrix, years)
+    df = pd.DataFrame(stats['matrix']).assign(year=years)
+    yearly = df.groupby('year').mean()
+    decade = df.drop(columns='year').groupby(years // 10 * 10).mean()
+    np.testing.assert_array_equal(stats['years'], yearly.index.to_numpy())
+    np.testing.assert_allclose(stats['year_means'], yearly.to_numpy(), rtol=1e-9, equal_nan=True)
+    np.testing.assert_array_equal(stats['decades'], decade.index.to_numpy())
+    np.testing.assert_allclose(stats['decade_means'], decade.to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+def test_all_nan_product_column_is_processed(tmp_path, monkeypatch):
+    source = pd.DataFrame({
+        'Entity': ['A', 'B', 'C', 'A', 'B', 'C'],
+        'Year': [2000, 2000, 2000, 2001, 2001, 2001],
+        'Maize Production (tonnes)': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        'Rice  Production ( tonnes)': [np.nan] * 6,
+    })
+    input_file = tmp_path / "input.csv"
+    source.to_csv(input_file, index=False)
+
+    # Log synchronously under tmp_path so the run never touches data_processing.log
+    log_file = tmp_path / "sanitise.log"
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(KeyValueFormatter())
+    monkeypatch.setattr(sanitise.logger, 'handlers', [handler])
+    level = sanitise.logger.level
+    sanitise.logger.setLevel(logging.DEBUG)  # exercise the lazily built DEBUG fields too
+    try:
+        result = sanitise.clean_and_process_data(str(input_file), str(tmp_path / "out"))
+    finally:
+        sanitise.logger.setLevel(level)
+        handler.close()
+
+    assert result is not None
+    assert result['Rice_Production'].isna().all()
+    log = log_file.read_text()
+    assert 'event=data_range column=Rice_Production min=null max=null' in log
+    assert 'entities=["A","B","C"]' in log
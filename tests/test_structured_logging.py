@@ -0,0 +1,29 @@
+import json
+import logging
+
+import numpy as np
+
+from structured_logging import KeyValueFormatter
+
+
+def _format(**fields):
+    record = logging.LogRecord('test', logging.INFO, __file__, 0, 'event_name', None, None)
+    record.fields = fields
+    return KeyValueFormatter().format(record).split(' level=INFO ', 1)[1]
+
+
+def test_strings_are_quoted_only_when_needed():
+    assert _format(a='plain', b='two words', c='') == 'logger=test event=event_name a=plain b="two words" c=""'
+
+
+def test_structured_values_are_json_encoded_once():
+    line = _format(entities=['A', 'B'], values=[np.nan, np.float64('inf'), 1.5],
+                   count=np.int64(3), array=np.array([1.0, np.nan]), nested={'k': 'a=b'}, missing=None)
+    assert line == ('logger=test event=event_name entities=["A","B"] values=[null,null,1.5] count=3 '
+                    'array=[1.0,null] nested={"k":"a=b"} missing=null')
+
+
+def test_spaces_inside_json_values_stay_one_token():
+    line = _format(entities=['United States'])
+    assert line.endswith(r'entities=["United\u0020States"]')
+    assert json.loads(line.split('entities=', 1)[1]) == ['United States']